@@ -0,0 +1,125 @@
+"""Benchmarks the article pipeline over the bundled sample documents."""
+import argparse
+import json
+import time
+
+import main
+from samples import SAMPLES
+
+STAGES = ["get_statistics", "get_title", "get_subsections", "write_section"]
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Returns the q-th percentile (0-100) of values, interpolating between ranks."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(spans: list[dict], article_seconds: list[float], elapsed: float) -> dict:
+    """Aggregates completion spans into per-stage and whole-run statistics."""
+    stages = {}
+    for stage in STAGES:
+        latencies = [span["latency"] for span in spans if span["stage"] == stage]
+        stages[stage] = {
+            "calls": len(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+        }
+
+    completed = [span for span in spans if "error" not in span]
+    prompt_tokens = sum(span["prompt_tokens"] for span in completed)
+    completion_tokens = sum(span["completion_tokens"] for span in completed)
+    return {
+        "articles": len(article_seconds),
+        "article_p50": percentile(article_seconds, 50),
+        "article_p95": percentile(article_seconds, 95),
+        "articles_per_minute": len(article_seconds) / elapsed * 60,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "tokens_per_second": (prompt_tokens + completion_tokens) / elapsed,
+        "cache_hits": sum(span["cache"] == "hit" for span in spans),
+        "errors": len(spans) - len(completed),
+        "cost": sum(span.get("cost", 0.0) for span in completed),
+        "stages": stages,
+    }
+
+
+def run_benchmark(
+    corpora: list[str], runs: int, max_sections: int, workers: int
+) -> dict:
+    """Generates an article per corpus per run and summarizes the recorded spans."""
+    sink = main.MemorySink()
+    main.tracer.add_sink(sink)
+    article_seconds = []
+    start = time.perf_counter()
+    try:
+        for _ in range(runs):
+            for name in corpora:
+                article_start = time.perf_counter()
+                main.generate_article(SAMPLES[name], max_sections, workers)
+                article_seconds.append(time.perf_counter() - article_start)
+    finally:
+        main.tracer.remove_sink(sink)
+    return summarize(sink.spans, article_seconds, time.perf_counter() - start)
+
+
+def print_report(report: dict):
+    print(
+        f"{report['articles']} articles, "
+        f"{report['articles_per_minute']:.1f} articles/min, "
+        f"p50 {report['article_p50']:.2f}s, p95 {report['article_p95']:.2f}s"
+    )
+    print(
+        f"{report['prompt_tokens']} prompt + {report['completion_tokens']} completion "
+        f"tokens, {report['tokens_per_second']:.0f} tokens/s, "
+        f"est. ${report['cost']:.4f}, "
+        f"{report['cache_hits']} cache hits, {report['errors']} errors"
+    )
+    for stage, stats in report["stages"].items():
+        print(
+            f"  {stage:<16} {stats['calls']:>4} calls  "
+            f"p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpora", nargs="+", default=list(SAMPLES), choices=SAMPLES)
+    parser.add_argument("--runs", type=int, default=1, help="passes over the corpora")
+    parser.add_argument("--sections", type=int, default=6, help="sections per article")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent sections")
+    parser.add_argument(
+        "--openai", action="store_true", help="call the OpenAI API instead of the fake"
+    )
+    parser.add_argument("--latency", type=float, default=0.5, help="fake call latency")
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=50.0, help="fake output throughput"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake failures")
+    parser.add_argument(
+        "--cache", action="store_true", help="serve repeated prompts from the cache"
+    )
+    parser.add_argument("--trace", help="append per-call spans to this JSONL file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if not args.openai:
+        main.set_backend(
+            main.FakeBackend(args.latency, args.tokens_per_second, args.error_rate)
+        )
+    if not args.cache:
+        # every pipeline call samples at temperature 1, so this bypasses the cache
+        main.response_cache.cache_nonzero_temperature = False
+    if args.trace:
+        main.tracer.add_sink(main.JsonlSink(args.trace))
+
+    report = run_benchmark(args.corpora, args.runs, args.sections, args.workers)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
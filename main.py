@@ -1,39 +1,132 @@
+import argparse
+import contextlib
+import hashlib
 import json
+import math
 import openai
+import queue
+import random
+import re
+import sqlite3
+import threading
 import tiktoken
 import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, Iterator, Protocol
 
-# read environment variables from file
-with open(".env", "r") as f:
-    for line in f:
-        key, value = line.split("=")
-        os.environ[key] = value
-openai.api_key = os.environ.get("OPENAI_API_KEY")
+from samples import AI, ROA
 
 
-def num_tokens_from_messages(messages, model="gpt-3.5-turbo-0301"):
-    """Returns the number of tokens used by a list of messages."""
+def load_env(path: str = ".env"):
+    """Reads environment variables from a file, if it exists."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            if "=" not in line:
+                continue
+            key, value = line.strip().split("=", 1)
+            os.environ[key] = value
+
+
+# (tokens per message, tokens per name, tokens priming each reply) for chat models
+# see https://github.com/openai/openai-cookbook/blob/main/examples/How_to_count_tokens_with_tiktoken.ipynb
+MESSAGE_OVERHEADS = {
+    "gpt-3.5-turbo-0301": (4, -1, 2),  # if there's a name, the role is omitted
+    "gpt-3.5-turbo-0613": (3, 1, 3),
+    "gpt-3.5-turbo-1106": (3, 1, 3),
+    "gpt-3.5-turbo-0125": (3, 1, 3),
+    "gpt-3.5-turbo-16k-0613": (3, 1, 3),
+    "gpt-4-0314": (3, 1, 3),
+    "gpt-4-0613": (3, 1, 3),
+    "gpt-4-32k-0314": (3, 1, 3),
+    "gpt-4-32k-0613": (3, 1, 3),
+    "gpt-4-turbo": (3, 1, 3),
+    "gpt-4o": (3, 1, 3),
+    "gpt-4o-mini": (3, 1, 3),
+}
+
+# undated model names and the snapshot whose overheads they share
+MODEL_ALIASES = {
+    "gpt-3.5-turbo": "gpt-3.5-turbo-0125",
+    "gpt-3.5-turbo-16k": "gpt-3.5-turbo-16k-0613",
+    "gpt-4": "gpt-4-0613",
+    "gpt-4-32k": "gpt-4-32k-0613",
+}
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """Returns the tokenizer for a model, building it only once per model."""
     try:
-        encoding = tiktoken.encoding_for_model(model)
+        return tiktoken.encoding_for_model(model)
     except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
-    if model == "gpt-3.5-turbo-0301":  # note: future models may deviate from this
-        num_tokens = 0
-        for message in messages:
-            num_tokens += (
-                4  # every message follows <im_start>{role/name}\n{content}<im_end>\n
-            )
-            for key, value in message.items():
-                num_tokens += len(encoding.encode(value))
-                if key == "name":  # if there's a name, the role is omitted
-                    num_tokens += -1  # role is always required and always 1 token
-        num_tokens += 2  # every reply is primed with <im_start>assistant
-        return num_tokens
-    else:
-        raise NotImplementedError(
-            f"""num_tokens_from_messages() is not presently implemented for model {model}.
+        return tiktoken.get_encoding("cl100k_base")
+
+
+@lru_cache(maxsize=None)
+def get_message_overhead(model: str) -> tuple[int, int, int]:
+    """Returns the per-message, per-name and reply-priming overheads of a model."""
+    if model in MESSAGE_OVERHEADS:
+        return MESSAGE_OVERHEADS[model]
+    # other snapshots and fine-tunes resolve through the longest known prefix,
+    # e.g. gpt-4o-2024-05-13 -> gpt-4o and gpt-4-0125-preview -> gpt-4 -> gpt-4-0613
+    targets = {**{name: name for name in MESSAGE_OVERHEADS}, **MODEL_ALIASES}
+    prefixes = [prefix for prefix in targets if model.startswith(prefix)]
+    if prefixes:
+        return MESSAGE_OVERHEADS[targets[max(prefixes, key=len)]]
+    raise NotImplementedError(
+        f"""num_tokens_from_messages() is not presently implemented for model {model}.
   See https://github.com/openai/openai-python/blob/main/chatml.md for information on how messages are converted to tokens."""
-        )
+    )
+
+
+def _count_message_tokens(
+    messages: list[dict], lengths: Iterator[int], model: str
+) -> int:
+    """Adds the model's message overheads to the encoded lengths of each value."""
+    tokens_per_message, tokens_per_name, tokens_per_reply = get_message_overhead(model)
+    num_tokens = 0
+    for message in messages:
+        num_tokens += tokens_per_message
+        for key in message:
+            num_tokens += next(lengths)
+            if key == "name":
+                num_tokens += tokens_per_name
+    return num_tokens + tokens_per_reply
+
+
+def num_tokens_from_message_batches(
+    message_lists: list[list[dict]], model="gpt-3.5-turbo-0301"
+) -> list[int]:
+    """Returns the number of tokens used by each of many lists of messages."""
+    # encode every value of every message in a single batch call
+    values = [
+        value
+        for messages in message_lists
+        for message in messages
+        for value in message.values()
+    ]
+    encoded = get_encoding(model).encode_batch(values)
+    lengths = iter([len(tokens) for tokens in encoded])
+    return [
+        _count_message_tokens(messages, lengths, model) for messages in message_lists
+    ]
+
+
+def num_tokens_from_messages(messages, model="gpt-3.5-turbo-0301"):
+    """Returns the number of tokens used by a list of messages."""
+    # encode directly; encode_batch starts a thread pool on every call
+    encoding = get_encoding(model)
+    lengths = (
+        len(encoding.encode(value))
+        for message in messages
+        for value in message.values()
+    )
+    return _count_message_tokens(messages, lengths, model)
 
 
 def get_system_message(message: str):
@@ -48,17 +141,606 @@ def get_assistant_message(message: str):
     return {"role": "assistant", "content": message}
 
 
-def get_completion(messages: str, temperature: float = 1.0):
-    completion = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo-0301",
-        messages=messages,
-        temperature=temperature,
+class ResponseCache:
+    """Disk-backed LRU cache of completions, keyed on (model, messages, temperature)."""
+
+    def __init__(
+        self,
+        path: str = ".cache/responses.sqlite",
+        max_entries: int = 10_000,
+        ttl: float | None = 7 * 24 * 60 * 60,
+        cache_nonzero_temperature: bool = True,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # set to False to always hit the API for sampled (temperature > 0) calls
+        self.cache_nonzero_temperature = cache_nonzero_temperature
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # open lazily so importing this module never touches the disk
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    @staticmethod
+    def make_key(model: str, messages: list[dict], temperature: float) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def enabled_for(self, temperature: float) -> bool:
+        return temperature == 0 or self.cache_nonzero_temperature
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                # expired entries count as misses and are dropped
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                connection.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            # evict the least recently used entries beyond the size bound
+            connection.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            connection.commit()
+
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connect().execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+response_cache = ResponseCache()
+
+
+class TransientBackendError(Exception):
+    """A retryable failure raised by a non-OpenAI backend."""
+
+
+# failures worth retrying; anything else is raised immediately
+TRANSIENT_ERRORS = (
+    TransientBackendError,
+    openai.error.RateLimitError,
+    openai.error.Timeout,
+    openai.error.APIError,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+)
+
+
+class CompletionScheduler:
+    """Keeps completion calls inside requests/tokens-per-minute budgets and retries them."""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 3_500,
+        tokens_per_minute: int = 90_000,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        retry_on: tuple = TRANSIENT_ERRORS,
+        window: float = 60.0,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.window = window
+        self._condition = threading.Condition()
+        # (timestamp, estimated tokens) of the calls made inside the window
+        self._calls = deque()
+        self._tokens_in_window = 0
+        # set after a rate limit error so every caller backs off, not just one
+        self._paused_until = 0.0
+        self.queue_depth = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.retries = 0
+        self.failures = 0
+
+    def _prune(self, now: float):
+        while self._calls and now - self._calls[0][0] >= self.window:
+            _, tokens = self._calls.popleft()
+            self._tokens_in_window -= tokens
+
+    def _delay_until_allowed(self, now: float, tokens: int) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+        if not self._calls:
+            # an empty window always admits a call, even one over the token budget
+            return 0.0
+        if (
+            len(self._calls) < self.requests_per_minute
+            and self._tokens_in_window + tokens <= self.tokens_per_minute
+        ):
+            return 0.0
+        return self._calls[0][0] + self.window - now
+
+    def acquire(self, tokens: int):
+        """Blocks until a call estimated at tokens fits in the budget, then reserves it."""
+        start = time.monotonic()
+        with self._condition:
+            self.queue_depth += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._prune(now)
+                    delay = self._delay_until_allowed(now, tokens)
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                self._calls.append((now, tokens))
+                self._tokens_in_window += tokens
+                waited = time.monotonic() - start
+                if waited > 0.001:
+                    self.waits += 1
+                    self.total_wait += waited
+                    self.max_wait = max(self.max_wait, waited)
+            finally:
+                self.queue_depth -= 1
+
+    def backoff(self, attempt: int) -> float:
+        """Returns a full-jitter exponential backoff delay for a retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def call(self, create, tokens: int):
+        """Calls create() within the budget, retrying transient failures."""
+        attempt = 0
+        while True:
+            self.acquire(tokens)
+            try:
+                return create()
+            except self.retry_on as e:
+                if attempt >= self.max_retries:
+                    with self._condition:
+                        self.failures += 1
+                    raise
+                delay = self.backoff(attempt)
+                attempt += 1
+                with self._condition:
+                    self.retries += 1
+                print(
+                    f"{type(e).__name__}, retrying in {delay:.1f}s "
+                    f"({attempt}/{self.max_retries})"
+                )
+                if isinstance(e, openai.error.RateLimitError):
+                    with self._condition:
+                        self._paused_until = max(
+                            self._paused_until, time.monotonic() + delay
+                        )
+                time.sleep(delay)
+
+    def metrics(self) -> dict:
+        with self._condition:
+            return {
+                "queue_depth": self.queue_depth,
+                "requests_in_window": len(self._calls),
+                "tokens_in_window": self._tokens_in_window,
+                "waits": self.waits,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+
+scheduler = CompletionScheduler()
+
+
+class CompletionBackend(Protocol):
+    """Anything that can turn chat messages into a reply."""
+
+    name: str
+
+    def complete(
+        self, messages: list[dict], model: str, temperature: float, max_tokens: int
+    ) -> tuple[str, bool]:
+        """Returns the reply and whether it was cut off at max_tokens."""
+        ...
+
+    def stream(
+        self, messages: list[dict], model: str, temperature: float, max_tokens: int
+    ) -> Iterator[str]:
+        ...
+
+
+class OpenAIBackend:
+    """Sends completions to the OpenAI chat API."""
+
+    name = "openai"
+
+    def __init__(self, env_path: str = ".env"):
+        self.env_path = env_path
+        self._configured = False
+
+    def _configure(self):
+        # read the API key on first use rather than at import time
+        if not self._configured:
+            load_env(self.env_path)
+            openai.api_key = os.environ.get("OPENAI_API_KEY")
+            self._configured = True
+
+    def complete(
+        self, messages: list[dict], model: str, temperature: float, max_tokens: int
+    ) -> tuple[str, bool]:
+        self._configure()
+        completion = openai.ChatCompletion.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            # cap the reply so the scheduler's token reservation holds
+            max_tokens=max_tokens,
+        )
+        choice = completion["choices"][0]
+        return choice["message"]["content"], choice["finish_reason"] == "length"
+
+    def stream(
+        self, messages: list[dict], model: str, temperature: float, max_tokens: int
+    ) -> Iterator[str]:
+        self._configure()
+        chunks = openai.ChatCompletion.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        for chunk in chunks:
+            choice = chunk["choices"][0]
+            content = choice["delta"].get("content")
+            if content:
+                yield content
+            if choice.get("finish_reason") == "length":
+                print(f"Streamed reply cut off at max_tokens={max_tokens}")
+
+
+FAKE_WORDS = (
+    "history geography economy culture trade population city river empire "
+    "ruins guild coin temple harbor dynasty council festival desert province"
+).split()
+
+
+class FakeBackend:
+    """Offline backend with simulated latency, throughput and errors for benchmarking."""
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        tokens_per_second: float = 50.0,
+        error_rate: float = 0.0,
+        reply_tokens: int = 100,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.reply_tokens = reply_tokens
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def reply(self, messages: list[dict], max_tokens: int) -> str:
+        """Returns the deterministic reply for a list of messages."""
+        digest = hashlib.sha256(
+            json.dumps(messages, sort_keys=True).encode("utf-8")
+        ).digest()
+        rng = random.Random(digest)
+        words = [
+            rng.choice(FAKE_WORDS) for _ in range(min(self.reply_tokens, max_tokens))
+        ]
+        # one short fact per line, comma-separated so list-shaped prompts parse too
+        return ",\n".join(
+            " ".join(words[i : i + 5]).capitalize() for i in range(0, len(words), 5)
+        )
+
+    def _start_call(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+        if fail:
+            time.sleep(self.latency)
+            raise TransientBackendError("simulated backend failure")
+
+    def complete(
+        self, messages: list[dict], model: str, temperature: float, max_tokens: int
+    ) -> tuple[str, bool]:
+        self._start_call()
+        reply = self.reply(messages, max_tokens)
+        # every fake word is a single token
+        time.sleep(self.latency + len(reply.split()) / self.tokens_per_second)
+        return reply, max_tokens < self.reply_tokens
+
+    def stream(
+        self, messages: list[dict], model: str, temperature: float, max_tokens: int
+    ) -> Iterator[str]:
+        self._start_call()
+        time.sleep(self.latency)
+        for i, word in enumerate(self.reply(messages, max_tokens).split(" ")):
+            time.sleep(1 / self.tokens_per_second)
+            yield word if i == 0 else " " + word
+
+
+backend: CompletionBackend = OpenAIBackend()
+
+
+# USD per 1K (prompt, completion) tokens
+PRICES = {
+    "gpt-3.5-turbo-0301": (0.002, 0.002),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+
+def get_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Returns the USD cost of a call, or 0 for models without a known price."""
+    prices = PRICES.get(model)
+    if prices is None:
+        # fall back to the longest priced prefix, e.g. gpt-4-0613 -> gpt-4
+        matches = [name for name in PRICES if model.startswith(name)]
+        if not matches:
+            return 0.0
+        prices = PRICES[max(matches, key=len)]
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000
+
+
+class JsonlSink:
+    """Appends every span to a JSONL trace file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, span: dict):
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(span) + "\n")
+
+
+class MemorySink:
+    """Keeps every span in memory, for benchmarks and tests."""
+
+    def __init__(self):
+        self.spans = []
+
+    def __call__(self, span: dict):
+        self.spans.append(span)
+
+
+class Tracer:
+    """Fans completion spans out to any number of sinks (callables taking a dict)."""
+
+    def __init__(self):
+        self.sinks = []
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+
+    def emit(self, span: dict):
+        for sink in self.sinks:
+            sink(span)
+
+
+tracer = Tracer()
+
+
+def set_backend(new_backend: CompletionBackend):
+    """Routes every subsequent completion through new_backend."""
+    global backend
+    backend = new_backend
+
+
+def _begin_completion(
+    messages: list[dict],
+    temperature: float,
+    model: str,
+    use_cache: bool,
+    stage: str | None,
+    prompt_tokens: int | None,
+    **span_fields,
+) -> tuple[dict, str | None, str | None]:
+    """Opens the span of a completion and looks it up in the response cache.
+
+    Returns the span, the cache key (None when caching is off) and any cached reply.
+    """
+    # callers that already counted the prompt pass their count in
+    if prompt_tokens is None:
+        prompt_tokens = num_tokens_from_messages(messages, model)
+    span = {
+        "stage": stage,
+        "backend": backend.name,
+        "model": model,
+        "started": time.time(),
+        "prompt_tokens": prompt_tokens,
+        "cache": "off",
+        **span_fields,
+    }
+
+    key = None
+    cached = None
+    if use_cache and response_cache.enabled_for(temperature):
+        # keep replies from different backends apart
+        key = ResponseCache.make_key(f"{backend.name}:{model}", messages, temperature)
+        cached = response_cache.get(key)
+        span["cache"] = "miss" if cached is None else "hit"
+    return span, key, cached
+
+
+def _fail_completion(span: dict, start: float, error: Exception):
+    span["latency"] = time.perf_counter() - start
+    span["error"] = f"{type(error).__name__}: {error}"
+    tracer.emit(span)
+
+
+def _finish_completion(span: dict, start: float, key: str | None, response: str):
+    """Caches a fresh reply and emits the span of a completed call."""
+    if key is not None and span["cache"] == "miss":
+        response_cache.set(key, response)
+
+    span["latency"] = time.perf_counter() - start
+    span["completion_tokens"] = len(get_encoding(span["model"]).encode(response))
+    # only calls that reached the paid API cost anything
+    span["cost"] = (
+        get_cost(span["model"], span["prompt_tokens"], span["completion_tokens"])
+        if span["cache"] != "hit" and span["backend"] == "openai"
+        else 0.0
     )
-    return completion["choices"][0]["message"]["content"]
+    tracer.emit(span)
 
 
-def query_llm(prompt: str, temperature: float = 1.0) -> str:
-    """Queries the LLM for a response to a prompt."""
+def get_completion(
+    messages: list[dict],
+    temperature: float = 1.0,
+    model: str = "gpt-3.5-turbo-0301",
+    use_cache: bool = True,
+    max_tokens: int = 500,
+    stage: str | None = None,
+    prompt_tokens: int | None = None,
+    drop_truncated_line: bool = False,
+):
+    start = time.perf_counter()
+    # serve repeated prompts from the response cache
+    span, key, response = _begin_completion(
+        messages, temperature, model, use_cache, stage, prompt_tokens
+    )
+
+    if response is None:
+        try:
+            # budget for the prompt plus the longest reply we expect back
+            response, truncated = scheduler.call(
+                lambda: backend.complete(messages, model, temperature, max_tokens),
+                span["prompt_tokens"] + max_tokens,
+            )
+        except Exception as e:
+            _fail_completion(span, start, e)
+            raise
+        if truncated:
+            span["truncated"] = True
+            print(f"{stage or 'Reply'} cut off at max_tokens={max_tokens}")
+            # list-shaped replies lose only their unfinished last line
+            if drop_truncated_line and "\n" in response:
+                response = response.rsplit("\n", 1)[0]
+
+    _finish_completion(span, start, key, response)
+    return response
+
+
+def get_completion_stream(
+    messages: list[dict],
+    temperature: float = 1.0,
+    model: str = "gpt-3.5-turbo-0301",
+    use_cache: bool = True,
+    max_tokens: int = 500,
+    stage: str | None = None,
+    prompt_tokens: int | None = None,
+) -> Iterator[str]:
+    """Yields a completion in chunks as they arrive, like get_completion otherwise."""
+    start = time.perf_counter()
+    span, key, cached = _begin_completion(
+        messages, temperature, model, use_cache, stage, prompt_tokens, stream=True
+    )
+
+    if cached is not None:
+        span["time_to_first_token"] = time.perf_counter() - start
+        yield cached
+        chunks = [cached]
+    else:
+
+        def open_stream():
+            stream = backend.stream(messages, model, temperature, max_tokens)
+            # pull the first chunk here so failures before any output are retried
+            return next(stream, ""), stream
+
+        try:
+            first, stream = scheduler.call(
+                open_stream, span["prompt_tokens"] + max_tokens
+            )
+            span["time_to_first_token"] = time.perf_counter() - start
+            chunks = [first]
+            yield first
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            _fail_completion(span, start, e)
+            raise
+
+    _finish_completion(span, start, key, "".join(chunks))
+
+
+def _prompt_message(prompt: str) -> tuple[dict, int]:
+    """Wraps a prompt in a user message and logs its start and token count."""
     # create a user message
     user_message = get_user_message(prompt)
 
@@ -69,12 +751,50 @@ def query_llm(prompt: str, temperature: float = 1.0) -> str:
     # print the prompt start and token count
     print(f"{prompt_start}...: {num_tokens} tokens")
 
+    return user_message, num_tokens
+
+
+def query_llm(
+    prompt: str,
+    temperature: float = 1.0,
+    stage: str | None = None,
+    max_tokens: int = 500,
+    drop_truncated_line: bool = False,
+) -> str:
+    """Queries the LLM for a response to a prompt."""
+    user_message, num_tokens = _prompt_message(prompt)
+
     # get a response
-    response = get_completion([user_message], temperature=temperature)
+    response = get_completion(
+        [user_message],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stage=stage,
+        prompt_tokens=num_tokens,
+        drop_truncated_line=drop_truncated_line,
+    )
 
     return response
 
 
+def query_llm_stream(
+    prompt: str,
+    temperature: float = 1.0,
+    stage: str | None = None,
+    max_tokens: int = 500,
+) -> Iterator[str]:
+    """Queries the LLM for a response to a prompt, yielding it in chunks."""
+    user_message, num_tokens = _prompt_message(prompt)
+
+    yield from get_completion_stream(
+        [user_message],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stage=stage,
+        prompt_tokens=num_tokens,
+    )
+
+
 def get_title(info: str) -> str:
     prompt = f"""
     What would the title of a Wikipedia article about this information be?
@@ -84,7 +804,7 @@ def get_title(info: str) -> str:
     Information: {info}
     """
     # query the LLM
-    response = query_llm(prompt)
+    response = query_llm(prompt, stage="get_title")
     # parse the response
     title = response
 
@@ -103,16 +823,15 @@ def get_subsections(info: str, title: str, number: int) -> list[str]:
     Information: {info}
     """
     # query the LLM
-    response = query_llm(prompt)
+    response = query_llm(prompt, stage="get_subsections")
     # parse the response
     subsections = response.replace('"', "").split(",")
 
     return subsections
 
 
-# rewrite write_section to use query_llm
-def write_section(info: str, title: str, subsection: str) -> str:
-    prompt = f"""
+def get_section_prompt(info: str, title: str, subsection: str) -> str:
+    return f"""
     Write a section of a Wikipedia article about this information.
     The answer MUST be a single paragraph.
     The answer MUST be at LEAST 100 and at MOST 500 tokens long.
@@ -121,120 +840,782 @@ def write_section(info: str, title: str, subsection: str) -> str:
     Subsection: {subsection}
     Information: {info}
     """
+
+
+# rewrite write_section to use query_llm
+def write_section(info: str, title: str, subsection: str) -> str:
+    prompt = get_section_prompt(info, title, subsection)
     # query the LLM
-    response = query_llm(prompt)
+    response = query_llm(prompt, stage="write_section")
     # parse the response
     section = response
 
     return section
 
 
-# rewrite get_statistics to use query_llm
-def get_statistics(info: str) -> str:
-    prompt = f"""
+def write_section_stream(info: str, title: str, subsection: str) -> Iterator[str]:
+    """Writes a section, yielding its text in chunks as they arrive."""
+    prompt = get_section_prompt(info, title, subsection)
+    yield from query_llm_stream(prompt, stage="write_section")
+
+
+def get_statistics_prompt(info: str) -> str:
+    return f"""
     Summarize this information in a list of facts. Be as detailed as possible without being redundant.
 
     Information: {info}
     """
+
+
+# rewrite get_statistics to use query_llm
+def get_statistics(info: str) -> str:
+    prompt = get_statistics_prompt(info)
     # query the LLM
-    response = query_llm(prompt)
+    # fact lists run longer than the other replies; one cut off at the cap loses
+    # its unfinished last fact rather than passing it on as a fact
+    response = query_llm(
+        prompt, stage="get_statistics", max_tokens=1000, drop_truncated_line=True
+    )
     # parse the response
     statistics = response
 
     return statistics
 
 
-if __name__ == "__main__":
-    xing = """Xing 
-    Total Population: 26,764,000
-    Urban Population: 1,338,200
-
-    Cities
-    Xing (Pop 166,895): Capital, Travelling Bazaar, Godflesh, Godsweat, Secta
-    Skuld (Pop: 182,068): Fish, Dye (Competing), Cereal
-    Everzhar (Pop: 212,412): Underdark trade, Silk, Blackwood, Silver (Competing)
-    Valentia (Pop: 242,757): Heart of Trade, Incense, Sandalwood (Competing), Dyes (Competing)
-    Ostia (Pop: 121,378): Sugar (Agave), Clay, Linens, Dye, Glass
-    Morlaix (Pop: 192,352): Montaigne Trade Center, Marble, Wine, Olives (Competing)
-    Lapidir (Pop: 136,551): Trade Center, Magic items, Brass, Water
-    A reconstructed Mulhorandi city to the south-east, bordering the Plains of Purple Sand. It has been rebuilt by a Djinn/Eisen consortium, and has aquifier pumps that act as a source of fresh water in the middle of the desert. While not ideal for Eisen, it acts as a research station for the Plains of Purple Sand.
-
-    Towns
-    Vanua (Pop: 8500): Dye (Competing), Sandalwood, Link between Skuld and Valentia
-    Alna (Pop: 8500): Linens, Link between Everzhar and Skuld
-    Boros (Pop: 8768): Cereal, Goats
-    Salarium (Pop: 7624): Salt, Residuum, Wizard Water
-    Nezra (Pop: 10562): Wizard Water, Afzelia, Iron
-    Southhold (Dwarven) (Pop: 5000): Mica, Persica, Copper, Silver (Competing)
-    Northhold (Dwarven)  (Pop: 5000): Persica, Granite, Silver (Competing)
-    Halhun (Pop: 8562): “Oasis in the Shadow”, Cereal, Desert Cattle, Wool
-    Tehran (Pop: 6562): Dyes (Competing), Oceanspray, Fish oils
-    Redaan (Pop: 8624): Stormglass, Lodestones, Lightning Tequila
-    Tel Nadir (Pop: 7062): Clay, Spellstone, 
-
-    Ruins
-    Mishtan: City of the Dead, Overrun by lycanthropic beasts and half-goliath monstrosities
-    Generator 2XY32B: Mulhorandi power station, Lightning dragon, Power to local settlements
-    Doha, The Cursed Orchard: ‘Fertile’ land, murderous plants, Poisoned waters; Planted by Thay
-    Tyche, The Fallen Vault: Sundered Divine Commerce Center, dominated by Ogre of Greed
-    Ruin of the Dauntless: A crashed Mulhorandi airship, reverse engineered to use divine energy
-    The Library of Twilight: Repository of knowledge, maps, trade routes, etc. Guarded by brotherhood of Dwarven monks. Frequently assaulted by roving bands of Underdark goblins.
-    Isle d’Morte: A solitary island acting as the treasure keep for the Blonde. Guarded by a flying ghost ship that terrorizes local settlements. Once a storage facility for dry goods and wares.
-    Cadara, The Drowsy Village: Village built on ruins haunted by dreams of undead worms and tentacled horrors. Cult of Vol slaughtering sandworms for power, but not really using the bodies. Surprise, Inno The Starborn is collecting parts of the corpses and stitching them together to create a sandworm tentacled horror deep below the town ruins. Fleshgod Inheritors are here to eat the thing when they/someone kills it. 
-    Abu Lirah, The Father of Stone: An abandoned marble quarry, populated by animated stone servitors. Ogath, a Vendel wizard has taken control of the area to research spellstone. Overexposure has led to maddened state and phenomenal thunderous power. Competes with a djinn previously bound in the quarry: Abu Rafaan, a lightning Djinn. Protected by line of Spinxes, the last of which being Hera.
-    The Quartz Monolith
-    Naga Temple: Coral parapet, Covered in mind fungus. Occupied by a lesser naga cult, domineered by Illsit the Vampire Knight (representative of the Black Hand and Grandfather’s Will). Roh’tempor the Water Baron is interested in this tower as it’s a natural aquifier from the ocean.
-    Lazo, The Town That Never Sleeps: This town repeats itself each day. The citizenry are aware of the loop, but unable to change it until a new stimulus is introduced. Secretly ‘ruled’ by the Seraph Ophanim, The Eternal Dawn. The Heralds of the Immaculate Dawn send non-believers to this town in an attempt to be reprogrammed. After about a year of looping, they’re believers.
-    Lethygon: A fallen Mulhorandi city at the center of the Thunder Plains. While the constant lightning and ionization is from the dragon at Generator 2XY32B, the main reason nothing grows in the Thunder Plains is due to Lethygon. Eisen has sent a recovery team to investigate the fallen industrial city, but it’s a meat-grinder of goblins, powermen and thunder mummies. Roh’tempor the Water Baron has a vested interest in it staying corrupt, as the water pollution makes his profit margins absurd. Fleshgod Inheritors delve into the ruins for spare bits of Titanflesh.
-    Wastril: A cavern containing a Mulhorandi waste processing plant. Despite its age, the machinery struggles to operate. Being run by Garr, a Duregar representative of House Aun’vayas.
-    Fresh Reservoir: Connected to the water table that filters through sandstone.
-    Filth Reservoir: Waste water intake from pipes across the Plains. Repurposed by Underdark to dump waste. Here there be giant spiders.
-    Primary Treatment: Remove large waste by automated crawlers. Inorganic and arcane removal through aeration, a danger zone of arcane energy. Spellbound gelatinous cubes.
-    Settling Tanks: Heavy waste (oils, stones) and organic solids settle into a slurry. The air is thick with miasma. A small clan of Underdark goblins have made a home here.
-    Secondary Treatment: A sauna of boiling waters around a central filtration tower. This feeds into the clean water reservoir. It’s leaking waste products into the reservoir and spoiling the entire process. At the core of the facility lies a trio of glass enclosures containing the ‘filters’. A Fleshgod Inheritor feeds off the faulty filters, occasionally makes trips to the Solid Processing plant to feed on organ there.
-    Solid Processing: Solids are digested to generate methane to power the facility, and produce biosolids. A nest of sandworms have made their home here.
-    Power Center: Originally a methane engine. Repurposed to pull energy from the sands, supplemented with the methane engine. Due to improper maintenance, large (unstable) crystals of concentrated magic have grown around the entire area. Occupied by a Powerman. Has cameras (static images) and sentry guns (sporadic).
-    The Forge of Night: The remnants of a thermal generator, the metallic superstructure hides a superheated cavern. Inside, various unbound elementals wander the halls while enslaved mortals struggle to gather materials for ‘the master’. Forgemaster Avela is a powerful free djinn that has torn apart the thermal engine to create her forge. She forges mortals into her equipment, gifting them to those that please her and using those that displease her as raw materials.
-    Armory 268XEA: Khamsin bandits inhabit the ruin, their best prize being a map of water trade routes stolen from Roh’tempor. Also a known roosting ground for the bands of wandering gruffs. Further in the ruins is a Mulhorandi weapons depot, a high tech vault of forgotten technology. The area is populated by zombies, controlled by the necromancer leader of an adventuring party trying to crack the vault. They’ve blocked off the vault while their Gallesian envoy does his stuff.
-    Psychos:
-    Magilla, Gori Rider Leader: Animal Companion / Totem Warrior / Earth Elemental
-    Zombies:
-    4 Badass Ghouls
-    1 Gruff Mummy, 3 Ghouls
-    Adventuring Party:
-    Sophia Richeza (Necromancer / Commander): Thay Outcast, Leader
-    Knight-Errant Bismarck (Ranger / Power Armor) : Eisen Reclaimer, DPS
-    Antoine de la Touche (Vanguard / Iron Tortoise): Montaigne Chevalier, Tank
-    Francisca (Lantern / Force of Will): Vodacce Witch, Healer
-    Astral Meteor: An ancient compound carved from white alabaster, possibly from the Astral Sea. The lack of ruined technology means that it isn’t Mulhorandi, but the architecture definitely points to something advanced. A large kiln lies undisturbed in the center, broken bits of porcelain and ceramics scattered around. Guarding this carved meteor are Reliquary Golems. The Men of Clay, bulky and misshapen automatons, act as mindless servants attempting to fulfill some long-dead purpose. The Porcelain Servitors, sleek and capable of intelligent discussion, cast faulty spells that don’t work outside of the Astral Sea. The Ceramic Immortals, heavily armored war golems, wait patiently for their masters to return and slay any who don’t fit the criteria.
-    Daelor: Hunting grounds for Elise the Raven, a member of the Blood of Vol. The ruins were assaulted by a Fleshgod Inheritor, who prowls around the conquered ruin and animates corpses to create the illusion of activity.
-    Icathia, The City That Never Was: Formerly known as Xerxes, Pride of the Seas (both material and astral). Xerxes was megacool back in the day before magic was ruined, they had the shiniest things, the coolest dudes, and that was all because they existed both in the material plane and in the astral sea simultaneously due to a very weak and easy to access rift into the astral sea. When magic imploded 400-600 years ago (roundabout), Xerxes fell completely into the astral sea much like Atlantis. The result is that the area Xerxes used to occupy is now Icathia, The City That Never Was which has properties of the astral sea: the laws of physics are only suggestions, spatial distribution makes no sense (think of the city scene in Inception), and it’s as if the island itself is dreaming of the former glory of Xerxes. In the astral sea geographic equivalent, Xerxes is eternally frozen in time and space in the moment that they fell into the astral sea. Viewed as one of the greatest losses in the failure of magic.
-    Aurelius: Village ruin that is no longer inhabited. Previous inhabitants were swindled and bamboozled by Aurelion Sol the giant space dragon deceiver. They were promised eternal life in the Astral Sea if they committed mass suicide (under the guise of some ritual or what have you) but in the end, Aurelion Sol simply harvested their souls (sol sounds like soul, what a coincidence) and used them as a power source for his own magic and will in the astral sea.
+LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+# wiki-style citation markers such as [3], [b] or [citation needed]
+CITATION = re.compile(r"\[(?:\d+|[a-z]|citation needed)\]")
+HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+LINE_EDGE_SPACE = re.compile(r" *\n *")
+EXTRA_BLANK_LINES = re.compile(r"\n{3,}")
+WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "their there this to was were which with".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Strips citation markers and redundant whitespace, keeping punctuation."""
+    text = CITATION.sub("", text)
+    text = HORIZONTAL_SPACE.sub(" ", text)
+    text = LINE_EDGE_SPACE.sub("\n", text)
+    return EXTRA_BLANK_LINES.sub("\n\n", text).strip()
+
+
+def tokenize(text: str) -> list[str]:
+    """Returns the lowercase words of text, without stopwords, for lexical scoring."""
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+class FactIndex:
+    """BM25 index over the facts of a statistics list."""
+
+    def __init__(self, statistics: str, k1: float = 1.5, b: float = 0.75):
+        self.facts = parse_facts(statistics)
+        self.k1 = k1
+        self.b = b
+        self._terms = [Counter(tokenize(fact)) for fact in self.facts]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._average_length = sum(self._lengths) / max(1, len(self.facts))
+        document_frequency = Counter(term for terms in self._terms for term in terms)
+        self._idf = {
+            term: math.log(1 + (len(self.facts) - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def score(self, query: str) -> list[float]:
+        """Returns the BM25 score of every fact against query."""
+        query_terms = set(tokenize(query))
+        scores = []
+        for terms, length in zip(self._terms, self._lengths):
+            # longer facts need more matches to score as highly
+            saturation = self.k1 * (1 - self.b + self.b * length / self._average_length)
+            score = 0.0
+            for term in query_terms & terms.keys():
+                frequency = terms[term]
+                score += (
+                    self._idf[term]
+                    * frequency
+                    * (self.k1 + 1)
+                    / (frequency + saturation)
+                )
+            scores.append(score)
+        return scores
+
+    def _top(self, scores: list[float], limit: int) -> str:
+        if not any(scores):
+            # nothing matches, so fall back to the leading facts
+            return format_facts(self.facts[:limit])
+        ranked = sorted(range(len(self.facts)), key=lambda i: -scores[i])[:limit]
+        return format_facts(self.facts[i] for i in sorted(ranked))
+
+    def relevant(self, query: str, limit: int) -> str:
+        """Returns the limit facts most relevant to query, in their original order."""
+        if len(self.facts) <= limit:
+            return format_facts(self.facts)
+        return self._top(self.score(query), limit)
+
+    def central(self, limit: int) -> str:
+        """Returns the limit facts that best represent the statistics as a whole."""
+        if len(self.facts) <= limit:
+            return format_facts(self.facts)
+        # a fact is central when the other facts match it well; outliers built
+        # from rare words match nothing else and score zero
+        scores = []
+        for i, fact in enumerate(self.facts):
+            matches = self.score(fact)
+            scores.append((sum(matches) - matches[i]) / (len(self.facts) - 1))
+        return self._top(scores, limit)
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo-0301") -> int:
+    """Returns the number of tokens in a bare piece of text."""
+    return len(get_encoding(model).encode(text))
+
+
+def iter_paragraphs(
+    lines: Iterable[str],
+    max_tokens: int | None = None,
+    model: str = "gpt-3.5-turbo-0301",
+) -> Iterator[str]:
+    """Yields the blank-line separated paragraphs of a stream of lines.
+
+    With max_tokens, a paragraph is also cut between lines once it would exceed
+    that many tokens, so text without blank lines is never buffered whole.
     """
-    ai = """Artificial intelligence (AI) is intelligence demonstrated by machines, as opposed to intelligence of humans and other animals. Example tasks in which this is done include speech recognition, computer vision, translation between (natural) languages, as well as other mappings of inputs.
-    AI applications include advanced web search engines (e.g., Google Search), recommendation systems (used by YouTube, Amazon, and Netflix), understanding human speech (such as Siri and Alexa), self-driving cars (e.g., Waymo and Tesla), generative or creative tools (ChatGPT and AI art), automated decision-making, and competing at the highest level in strategic game systems (such as chess and Go).[1]
-    As machines become increasingly capable, tasks considered to require "intelligence" are often removed from the definition of AI, a phenomenon known as the AI effect. For instance, optical character recognition is frequently excluded from things considered to be AI, having become a routine technology.[2]
-    Artificial intelligence was founded as an academic discipline in 1956, and in the years since it has experienced several waves of optimism,[3][4] followed by disappointment and the loss of funding (known as an "AI winter"),[5][6] followed by new approaches, success, and renewed funding.[4][7] AI research has tried and discarded many different approaches, including simulating the brain, modeling human problem solving, formal logic, large databases of knowledge, and imitating animal behavior. In the first decades of the 21st century, highly mathematical and statistical machine learning has dominated the field, and this technique has proved highly successful, helping to solve many challenging problems throughout industry and academia.[7][8]
-    The various sub-fields of AI research are centered around particular goals and the use of particular tools. The traditional goals of AI research include reasoning, knowledge representation, planning, learning, natural language processing, perception, and the ability to move and manipulate objects.[a] General intelligence (the ability to solve an arbitrary problem) is among the field's long-term goals.[9] To solve these problems, AI researchers have adapted and integrated a wide range of problem-solving techniques, including search and mathematical optimization, formal logic, artificial neural networks, and methods based on statistics, probability, and economics. AI also draws upon computer science, psychology, linguistics, philosophy, and many other fields.
-    The field was founded on the assumption that human intelligence "can be so precisely described that a machine can be made to simulate it".[b] This raised philosophical arguments about the mind and the ethical consequences of creating artificial beings endowed with human-like intelligence; these issues have previously been explored by myth, fiction, and philosophy since antiquity.[11] Computer scientists and philosophers have since suggested that AI may become an existential risk to humanity if its rational capacities are not steered towards beneficial goals.[c] The term artificial intelligence has also been criticized for overhyping AI's true technological capabilities.[12][13][14]"""
-    # filter info to be alphabetic only
-    ai = "".join([c for c in ai if c.isalpha() or c == " "])
-
-    roa = """The Roanoke Island, North Carolina, half dollar (also Roanoke Island half dollar) is a commemorative coin issued by the United States Bureau of the Mint in 1937. The coin commemorated the 350th anniversary of the Roanoke Colony, depicting Sir Walter Raleigh on one side, and on the other Eleanor Dare, holding her child, Virginia Dare, the first child of English descent born in an English colony in the Americas.
-    The Roanoke Island half dollar was one of many commemorative issues authorized by Congress in 1936. Since it was intended to commemorate the 350th anniversary of the colony, founded in 1587, the coins were not struck until 1937. William Marks Simpson, a sculptor who created several commemorative coins of the era, designed the Roanoke Island issue. His work required only slight modification at the recommendation of the Commission of Fine Arts.
-    The legislation allowed the Roanoke Memorial Association to buy at least 25,000 at a time, so long as the issue took place before July 1937, and the group placed two orders for the minimum amount. Eventually, 21,000 were returned to the Mint for redemption and melting. The Roanoke Island issue catalogs in the low hundreds of dollars."""
-    roa = "".join([c for c in roa if c.isalpha() or c == " "])
-
-    dance = """It seemed as if the palace had always housed the Atrius Building Commission, the company of clerks and estate agents who authored and notarized nearly every construction of any note in the Empire. It had stood for two hundred and fifty years, since the reign of the Emperor Magnus, a plain-fronted and austere hall on a minor but respectable plaza in the Imperial City. Energetic and ambitious middle-class lads and ladies worked there, as well as complacent middle-aged ones like Decumus Scotti. No one could imagine a world without the Commission, least of all Scotti. To be accurate, he could not imagine a world without himself in the Commission. "Lord Atrius is perfectly aware of your contributions," said the managing clerk, closing the shutter that demarcated Scotti's office behind him. "But you know that things have been difficult." "Yes," said Scotti, stiffly. "Lord Vanech's men have been giving us a lot of competition lately, and we must be more efficient if we are to survive. Unfortunately, that means releasing some of our historically best but presently underachieving senior clerks." "I understand. Can't be helped." "I'm glad that you understand," smiled the managing clerk, smiling thinly and withdrawing. "Please have your room cleared immediately." Scotti began the task of organizing all his work to pass on to his successor. It would probably be young Imbrallius who would take most of it on, which was as it should be, he considered philosophically. The lad knew how to find business. Scotti wondered idly what the fellow would do with the contracts for the new statue of St Alessia for which the Temple of the One had applied. Probably invent a clerical error, blame it on his old predecessor Decumus Scotti, and require an additional cost to rectify. "I have correspondence for Decumus Scotti of the Atrius Building Commission." Scotti looked up. A fat-faced courier had entered his office and was thrusting forth a sealed scroll. He handed the boy a gold piece, and opened it up. By the poor penmanship, atrocious spelling and grammar, and overall unprofessional tone, it was manifestly evident who the writer was. Liodes Jurus, a fellow clerk some years before, who had left the Commission after being accused of unethical business practices. "Dear Sckotti, I emagine you alway wondered what happened to me, and the last plase you would have expected to find me is out in the woods. But thats exactly where I am. Ha ha. If your'e smart and want to make lot of extra gold for Lord Atrius (and yourself, ha ha), youll come down to Vallinwood too. If you have'nt or have been following the politics hear lately, you may or may not know that ther's bin a war between the Boshmer and there neighbors Elswere over the past two years. Things have only just calm down, and ther's a lot that needs to be rebuilt. Now Ive got more business than I can handel, but I need somone with some clout, someone representing a respected agencie to get the quill in the ink. That somone is you, my fiend. Come & meat me at the M'ther Paskos Tavern in Falinnesti, Vallinwood. Ill be here 2 weeks and you wont be sorrie. -- Jurus P.S.: Bring a wagenload of timber if you can." "What do you have there, Scotti?" asked a voice. Scotti started. It was Imbrallius, his damnably handsome face peeking through the shutters, smiling in that way that melted the hearts of the stingiest of patrons and the roughest of stonemasons. Scotti shoved the letter in his jacket pocket. "Personal correspondence," he sniffed. "I'll be cleared up here in a just a moment." "I don't want to hurry you," said Imbrallius, grabbing a few sheets of blank contracts from Scotti's desk. "I've just gone through a stack, and the junior scribes hands are all cramping up, so I thought you wouldn't miss a few." The lad vanished. Scotti retrieved the letter and read it again. He thought about his life, something he rarely did. It seemed a sea of gray with a black insurmountable wall looming. There was only one narrow passage he could see in that wall. Quickly, before he had a moment to reconsider it, he grabbed a dozen of the blank contracts with the shimmering gold leaf ATRIUS BUILDING COMMISSION BY APPOINTMENT OF HIS IMPERIAL MAJESTY and hid them in the satchel with his personal effects. The next day he began his adventure with a giddy lack of hesitation. He arranged for a seat in a caravan bound for Valenwood, the single escorted conveyance to the southeast leaving the Imperial City that week. He had scarcely hours to pack, but he remembered to purchase a wagonload of timber. "It will be extra gold to pay for a horse to pull that," frowned the convoy head. "So I anticipated," smiled Scotti with his best Imbrallius grin. Ten wagons in all set off that afternoon through the familiar Cyrodilic countryside. Past fields of wildflowers, gently rolling woodlands, friendly hamlets. The clop of the horses' hooves against the sound stone road reminded Scotti that the Atrius Building Commission constructed it. Five of the eighteen necessary contracts for its completion were drafted by his own hand. "Very smart of you to bring that wood along," said a gray-whiskered Breton man next to him on his wagon. "You must be in Commerce." "Of a sort," said Scotti, in a way he hoped was mysterious, before introducing himself: "Decumus Scotti." "Gryf Mallon," said the man. "I'm a poet, actually a translator of old Bosmer literature. I was researching some newly discovered tracts of the Mnoriad Pley Bar two years ago when the war broke out and I had to leave. You are no doubt familiar with the Mnoriad, if you're aware of the Green Pact." Scotti thought the man might be speaking perfect gibberish, but he nodded his head. "Naturally, I don't pretend that the Mnoriad is as renowned as the Meh Ayleidion, or as ancient as the Dansir Gol, but I think it has a remarkable significance to understanding the nature of the merelithic Bosmer mind. The origin of the Wood Elf aversion to cutting their own wood or eating any plant material at all, yet paradoxically their willingness to import plantstuff from other cultures, I feel can be linked to a passage in the Mnoriad," Mallon shuffled through some of his papers, searching for the appropriate text. To Scotti's vast relief, the carriage soon stopped to camp for the night. They were high on a bluff over a gray stream, and before them was the great valley of Valenwood. Only the cry of seabirds declared the presence of the ocean to the bay to the west: here the timber was so tall and wide, twisting around itself like an impossible knot begun eons ago, to be impenetrable. A few more modest trees, only fifty feet to the lowest branches, stood on the cliff at the edge of camp. The sight was so alien to Scotti and he found himself so anxious about the proposition of entering the wilderness that he could not imagine sleeping. Fortunately, Mallon had supposed he had found another academic with a passion for the riddles of ancient cultures. Long into the night, he recited Bosmer verse in the original and in his own translation, sobbing and bellowing and whispering wherever appropriate. Gradually, Scotti began to feel drowsy, but a sudden crack of wood snapping made him sit straight up. "What was that?" Mallon smiled: "I like it too. 'Convocation in the malignity of the moonless speculum, a dance of fire --'" "There are some enormous birds up in the trees moving around," whispered Scotti, pointing in the direction of the dark shapes above. "I wouldn't worry about that," said Mallon, irritated with his audience. "Now listen to how the poet characterizes Herma-Mora's invocation in the eighteenth stanza of the fourth book." The dark shapes in the trees were some of them perched like birds, others slithered like snakes, and still others stood up straight like men. As Mallon recited his verse, Scotti watched the figures softly leap from branch to branch, half-gliding across impossible distances for anything without wings. They gathered in groups and then reorganized until they had spread to every tree around the camp. Suddenly they plummeted from the heights. "Mara!" cried Scotti. "They're falling like rain!" "Probably seed pods," Mallon shrugged, not turning around. "Some of the trees have remarkable --" The camp erupted into chaos. Fires burst out in the wagons, the horses wailed from mortal blows, casks of wine, fresh water, and liquor gushed their contents to the ground. A nimble shadow dashed past Scotti and Mallon, gathering sacks of grain and gold with impossible agility and grace. Scotti had only one glance at it, lit up by a sudden nearby burst of flame. It was a sleek creature with pointed ears, wide yellow eyes, mottled pied fur and a tail like a whip. "Werewolf," he whimpered, shrinking back. "Cathay-raht," groaned Mallon. "Much worse. Khajiti cousins or some such thing, come to plunder." "Are you sure?" As quickly as they struck, the creatures retreated, diving off the bluff before the battlemage and knight, the caravan's escorts, had fully opened their eyes. Mallon and Scotti ran to the precipice and saw a hundred feet below the tiny figures dash out of the water, shake themselves, and disappear into the wood. "Werewolves aren't acrobats like that," said Mallon. "They were definitely Cathay-raht. Bastard thieves. Thank Stendarr they didn't realize the value of my notebooks. It wasn't a complete loss."
+    paragraph = []
+    paragraph_tokens = 0
+    for line in lines:
+        if not line.strip():
+            if paragraph:
+                yield "\n".join(paragraph)
+                paragraph = []
+                paragraph_tokens = 0
+            continue
+        line = line.rstrip("\n")
+        if max_tokens is not None:
+            line_tokens = count_tokens(line + "\n", model)
+            if paragraph and paragraph_tokens + line_tokens > max_tokens:
+                yield "\n".join(paragraph)
+                paragraph = []
+                paragraph_tokens = 0
+            paragraph_tokens += line_tokens
+        paragraph.append(line)
+    if paragraph:
+        yield "\n".join(paragraph)
+
+
+def split_paragraph(paragraph: str, max_tokens: int, model: str) -> Iterator[str]:
+    """Splits a paragraph that is too large for one chunk on lines, then on words."""
+    for line in paragraph.split("\n"):
+        if count_tokens(line, model) <= max_tokens:
+            yield line
+            continue
+        piece = []
+        piece_tokens = 0
+        for word in line.split(" "):
+            word_tokens = count_tokens(" " + word, model)
+            if piece and piece_tokens + word_tokens > max_tokens:
+                yield " ".join(piece)
+                piece = []
+                piece_tokens = 0
+            piece.append(word)
+            piece_tokens += word_tokens
+        if piece:
+            yield " ".join(piece)
+
+
+def chunk_text(
+    lines: Iterable[str],
+    max_tokens: int = 1500,
+    model: str = "gpt-3.5-turbo-0301",
+) -> Iterator[str]:
+    """Packs whole paragraphs into chunks whose statistics prompts fit in max_tokens."""
+    # leave room for the prompt wrapped around every chunk
+    budget = max_tokens - num_tokens_from_messages(
+        [get_user_message(get_statistics_prompt(""))], model
+    )
+    if budget <= 0:
+        raise ValueError(f"max_tokens={max_tokens} leaves no room for the input")
+
+    chunk = []
+    chunk_tokens = 0
+    for paragraph in iter_paragraphs(lines, budget, model):
+        pieces = (
+            [paragraph]
+            if count_tokens(paragraph, model) <= budget
+            else split_paragraph(paragraph, budget, model)
+        )
+        for piece in pieces:
+            # paragraphs are joined by a blank line, which costs a token or two
+            piece_tokens = count_tokens(piece + "\n\n", model)
+            if chunk and chunk_tokens + piece_tokens > budget:
+                yield "\n\n".join(chunk)
+                chunk = []
+                chunk_tokens = 0
+            chunk.append(piece)
+            chunk_tokens += piece_tokens
+    if chunk:
+        yield "\n\n".join(chunk)
+
+
+def bounded_map(function, items: Iterable, max_workers: int = 4) -> Iterator:
+    """Like executor.map, but only pulls items from the iterable as workers free up."""
+    max_workers = max(1, max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(function, item))
+            # keep at most two items per worker in memory
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def parse_facts(statistics: str) -> list[str]:
+    """Returns the facts of a statistics list without their list markers."""
+    facts = []
+    for line in statistics.splitlines():
+        # drop list markers like "-", "*", "•" or "12."
+        fact = LIST_MARKER.sub("", line).strip()
+        if fact:
+            facts.append(fact)
+    return facts
+
+
+def format_facts(facts: Iterable[str]) -> str:
+    return "\n".join(f"- {fact}" for fact in facts)
+
+
+def merge_statistics(statistics: Iterable[str]) -> str:
+    """Merges fact lists into one, dropping facts that repeat an earlier one."""
+    seen = set()
+    facts = []
+    for text in statistics:
+        for fact in parse_facts(text):
+            key = " ".join(tokenize(fact))
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            facts.append(fact)
+    return format_facts(facts)
+
+
+def summarize_statistics(
+    info: str | Iterable[str],
+    max_tokens: int = 1500,
+    max_workers: int = 4,
+    model: str = "gpt-3.5-turbo-0301",
+) -> str:
+    """Summarizes info into facts, map-reducing over chunks when it is too large.
+
+    info may be a string or any iterable of lines, such as an open file, which is
+    read lazily so only the chunks in flight are held in memory.
     """
+    lines = info.splitlines() if isinstance(info, str) else info
+    # normalize line by line so streamed input is never held whole
+    lines = (normalize_text(line) + "\n" for line in lines)
+    chunks = chunk_text(lines, max_tokens, model)
+
+    first = next(chunks, None)
+    if first is None:
+        return ""
+    second = next(chunks, None)
+    if second is None:
+        # small inputs go through a single statistics call
+        return get_statistics(first)
+
+    def all_chunks():
+        yield first
+        yield second
+        yield from chunks
+
+    statistics = merge_statistics(
+        bounded_map(get_statistics, all_chunks(), max_workers)
+    )
+    return reduce_statistics(statistics, max_tokens, max_workers, model)
+
+
+def statistics_tokens(statistics: str, model: str = "gpt-3.5-turbo-0301") -> int:
+    """Returns the size of the statistics prompt that would carry these facts."""
+    return num_tokens_from_messages(
+        [get_user_message(get_statistics_prompt(statistics))], model
+    )
+
+
+def truncate_facts(statistics: str, max_tokens: int, model: str) -> str:
+    """Keeps the leading facts whose statistics prompt fits in max_tokens."""
+    budget = max_tokens - statistics_tokens("", model)
+    facts = []
+    used = 0
+    for fact in parse_facts(statistics):
+        fact_tokens = count_tokens(f"- {fact}\n", model)
+        if used + fact_tokens > budget:
+            break
+        facts.append(fact)
+        used += fact_tokens
+    return format_facts(facts)
+
+
+def reduce_statistics(
+    statistics: str,
+    max_tokens: int = 1500,
+    max_workers: int = 4,
+    model: str = "gpt-3.5-turbo-0301",
+) -> str:
+    """Re-summarizes merged facts, level by level, until they fit in max_tokens.
+
+    Each level packs the facts into chunks of at most max_tokens, summarizes the
+    chunks in parallel and merges the results, so book-length inputs end up with
+    statistics as small as those of a single chunk.
+    """
+    size = statistics_tokens(statistics, model)
+    while size > max_tokens:
+        chunks = chunk_text(statistics.splitlines(keepends=True), max_tokens, model)
+        reduced = merge_statistics(bounded_map(get_statistics, chunks, max_workers))
+        reduced_size = statistics_tokens(reduced, model)
+        if reduced_size >= size:
+            # summarizing stopped shrinking the facts, so drop the trailing ones
+            return truncate_facts(reduced, max_tokens, model)
+        statistics, size = reduced, reduced_size
+    return statistics
+
+
+def plan_article(
+    info: str | Iterable[str],
+    max_sections: int,
+    max_workers: int = 4,
+    facts_per_section: int = 10,
+) -> dict:
+    """Runs the planning stages of an article, up to the facts for each section.
+
+    The title and each section are only sent the facts relevant to them, at most
+    facts_per_section of them; the token savings over sending every fact are
+    reported under "prompt_savings".
+    """
+    timings = {}
+
+    # the planning stages depend on each other, so run them in order
+    start = time.perf_counter()
+    stats = summarize_statistics(info, max_workers=max_workers)
+    timings["get_statistics"] = time.perf_counter() - start
+
+    index = FactIndex(stats)
+    title_facts = index.central(facts_per_section)
+    start = time.perf_counter()
+    title = get_title(title_facts)
+    timings["get_title"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    subsections = get_subsections(stats, title, max_sections)[:max_sections]
+    subsections = [subsection.strip() for subsection in subsections]
+    timings["get_subsections"] = time.perf_counter() - start
+
+    section_facts = [
+        index.relevant(f"{title} {subsection}", facts_per_section)
+        for subsection in subsections
+    ]
+
+    # compare against sending the full statistics to the title and every section
+    baseline = count_tokens(stats) * (len(subsections) + 1)
+    sent = sum(count_tokens(facts) for facts in [title_facts, *section_facts])
+    prompt_savings = {
+        "baseline_tokens": baseline,
+        "sent_tokens": sent,
+        "saved_tokens": baseline - sent,
+        "saved_ratio": (baseline - sent) / baseline if baseline else 0.0,
+    }
+
+    return {
+        "title": title,
+        "statistics": stats,
+        "subsections": subsections,
+        "section_facts": section_facts,
+        "timings": timings,
+        "prompt_savings": prompt_savings,
+    }
+
+
+def assemble_article(
+    plan: dict, sections: list[str], section_seconds: list[float], seconds: float
+) -> dict:
+    """Combines a plan and its written sections into the article dict."""
+    section_timings = [
+        {"subsection": subsection, "seconds": elapsed}
+        for subsection, elapsed in zip(plan["subsections"], section_seconds)
+    ]
+    return {
+        "title": plan["title"],
+        "statistics": plan["statistics"],
+        "subsections": plan["subsections"],
+        "sections": sections,
+        "timings": {
+            **plan["timings"],
+            "write_sections": seconds,
+            "sections": section_timings,
+        },
+        "prompt_savings": plan["prompt_savings"],
+    }
+
+
+def generate_article(
+    info: str | Iterable[str],
+    max_sections: int,
+    max_workers: int = 4,
+    facts_per_section: int = 10,
+) -> dict:
+    """Generates a full article, writing every subsection concurrently."""
+    plan = plan_article(info, max_sections, max_workers, facts_per_section)
+
+    def timed_section(subsection: str, facts: str) -> tuple[str, float]:
+        section_start = time.perf_counter()
+        section = write_section(facts, plan["title"], subsection)
+        return section, time.perf_counter() - section_start
+
+    # fan out the sections; map preserves the original subsection order
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = list(
+            executor.map(timed_section, plan["subsections"], plan["section_facts"])
+        )
+
+    return assemble_article(
+        plan,
+        [section for section, _ in results],
+        [seconds for _, seconds in results],
+        time.perf_counter() - start,
+    )
+
+
+def stream_article(
+    info: str | Iterable[str],
+    max_sections: int,
+    max_workers: int = 4,
+    ordered: bool = True,
+    facts_per_section: int = 10,
+) -> Iterator[dict]:
+    """Generates an article, yielding its text as it is written.
+
+    Yields {"type": "chunk", "section", "subsection", "text"} events, then one
+    {"type": "article", ...} event holding what generate_article would return.
+    Sections are written concurrently. With ordered, chunks of a section are held
+    back until every earlier section has finished, so the output reads top to
+    bottom; otherwise chunks are yielded as soon as they arrive.
+    """
+    plan = plan_article(info, max_sections, max_workers, facts_per_section)
+    title = plan["title"]
+    subsections = plan["subsections"]
+
+    chunks = queue.Queue()
+    texts = [[] for _ in subsections]
+    section_seconds = [0.0] * len(subsections)
+
+    def write(index: int, subsection: str):
+        section_start = time.perf_counter()
+        try:
+            facts = plan["section_facts"][index]
+            for text in write_section_stream(facts, title, subsection):
+                chunks.put((index, text))
+        finally:
+            section_seconds[index] = time.perf_counter() - section_start
+            # None marks the end of a section, even a failed one
+            chunks.put((index, None))
+
+    def chunk(index: int, text: str) -> dict:
+        return {
+            "type": "chunk",
+            "section": index,
+            "subsection": subsections[index],
+            "text": text,
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [
+            executor.submit(write, index, subsection)
+            for index, subsection in enumerate(subsections)
+        ]
+
+        buffered = [[] for _ in subsections]
+        finished = [False] * len(subsections)
+        current = 0
+        remaining = len(subsections)
+        while remaining:
+            index, text = chunks.get()
+            if text is None:
+                remaining -= 1
+                finished[index] = True
+            else:
+                texts[index].append(text)
+                if not ordered or index == current:
+                    yield chunk(index, text)
+                else:
+                    buffered[index].append(text)
+            # flush the buffered sections that are now next in line
+            while ordered and current < len(subsections) and finished[current]:
+                current += 1
+                if current < len(subsections):
+                    for text in buffered[current]:
+                        yield chunk(current, text)
+                    buffered[current] = []
+
+        # surface any section failure
+        for future in futures:
+            future.result()
+
+    yield {
+        "type": "article",
+        **assemble_article(
+            plan,
+            ["".join(text) for text in texts],
+            section_seconds,
+            time.perf_counter() - start,
+        ),
+    }
+
+
+# marks the end of a batch queue
+_DONE = object()
+
+
+def _run_stage(stage, inbox: queue.Queue, outbox: queue.Queue, workers: int):
+    """Starts worker threads that apply stage to every job passing through."""
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def work():
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                # let sibling workers see the sentinel too; the last one forwards it
+                inbox.put(_DONE)
+                with lock:
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        outbox.put(_DONE)
+                return
+            try:
+                stage(job)
+            except Exception as e:
+                # drop failed jobs so a resumed run retries them
+                print(f"{job['id']}: {type(e).__name__}: {e}")
+                continue
+            outbox.put(job)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def repair_partial_line(output_path: str):
+    """Ends output_path on a line break so appended articles start a fresh line.
+
+    An interrupted run can leave half an article on the last line; it is cut off
+    so the article is regenerated. A complete last line that merely lacks its
+    line break is kept.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        # find the start of the last line by scanning backwards in blocks
+        position = end
+        while position > 0:
+            block_start = max(0, position - 4096)
+            f.seek(block_start)
+            block = f.read(position - block_start)
+            if position == end and block.endswith(b"\n"):
+                return
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                position = block_start + newline + 1
+                break
+            position = block_start
+        f.seek(position)
+        tail = f.read()
+        try:
+            json.loads(tail)
+        except ValueError:
+            f.truncate(position)
+        else:
+            f.write(b"\n")
+
+
+def read_completed_ids(output_path: str) -> set:
+    """Returns the ids of the articles already written to output_path."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r") as f:
+        for line in f:
+            try:
+                completed.add(json.loads(line)["id"])
+            except (json.JSONDecodeError, KeyError):
+                # a partially written last line from an interrupted run
+                continue
+    return completed
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    max_sections: int = 6,
+    workers: int = 4,
+    queue_size: int = 16,
+    facts_per_section: int = 10,
+) -> int:
+    """Generates an article for every {"id", "info"} line of a JSONL file."""
+    # every stage needs at least one worker to forward the end-of-input marker
+    workers = max(1, workers)
+    repair_partial_line(output_path)
+    completed = read_completed_ids(output_path)
+    section_pool = ThreadPoolExecutor(max_workers=max(1, workers * max_sections))
+
+    def statistics_stage(job: dict):
+        job["statistics"] = summarize_statistics(job["info"])
+
+    def title_stage(job: dict):
+        job["facts"] = FactIndex(job["statistics"])
+        job["title"] = get_title(job["facts"].central(facts_per_section))
+
+    def subsections_stage(job: dict):
+        subsections = get_subsections(job["statistics"], job["title"], max_sections)
+        job["subsections"] = [s.strip() for s in subsections[:max_sections]]
+
+    def sections_stage(job: dict):
+        job["sections"] = list(
+            section_pool.map(
+                lambda subsection: write_section(
+                    job["facts"].relevant(
+                        f"{job['title']} {subsection}", facts_per_section
+                    ),
+                    job["title"],
+                    subsection,
+                ),
+                job["subsections"],
+            )
+        )
+
+    # bounded queues between stages keep many documents in flight at once
+    stages = [statistics_stage, title_stage, subsections_stage, sections_stage]
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+    for stage, inbox, outbox in zip(stages, queues, queues[1:]):
+        _run_stage(stage, inbox, outbox, workers)
+
+    # an exception that stopped the producer, re-raised once the pipeline drains
+    producer_errors = []
+
+    def produce():
+        try:
+            with open(input_path, "r") as f:
+                for number, line in enumerate(f):
+                    if not line.strip():
+                        continue
+                    try:
+                        job = json.loads(line)
+                        if not isinstance(job, dict) or "info" not in job:
+                            raise ValueError('expected an object with an "info" key')
+                    except ValueError as e:
+                        # skip bad lines like failed stages, so the rest still run
+                        print(f"{input_path}:{number + 1}: {type(e).__name__}: {e}")
+                        continue
+                    job.setdefault("id", number)
+                    if job["id"] in completed:
+                        continue
+                    job["started"] = time.perf_counter()
+                    queues[0].put(job)
+        except Exception as e:
+            producer_errors.append(e)
+        finally:
+            queues[0].put(_DONE)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    # stream finished articles out as they complete
+    written = 0
+    start = time.perf_counter()
+    with open(output_path, "a") as f:
+        while True:
+            job = queues[-1].get()
+            if job is _DONE:
+                break
+            article = {
+                "id": job["id"],
+                "title": job["title"],
+                "statistics": job["statistics"],
+                "subsections": job["subsections"],
+                "sections": job["sections"],
+                "seconds": time.perf_counter() - job["started"],
+            }
+            f.write(json.dumps(article) + "\n")
+            f.flush()
+            written += 1
+    section_pool.shutdown()
+    if producer_errors:
+        raise producer_errors[0]
+
+    elapsed = time.perf_counter() - start
+    if written:
+        print(
+            f"Wrote {written} articles in {elapsed:.1f}s "
+            f"({written / elapsed * 60:.1f} articles/min)"
+        )
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Wikipedia-style articles.")
+    parser.add_argument("--batch", help="JSONL file of {\"id\", \"info\"} documents")
+    parser.add_argument("--output", default="articles.jsonl", help="output JSONL file")
+    parser.add_argument("--sections", type=int, default=6, help="sections per article")
+    parser.add_argument("--workers", type=int, default=4, help="workers per stage")
+    parser.add_argument(
+        "--fake", action="store_true", help="use the offline fake backend"
+    )
+    parser.add_argument("--trace", help="append per-call spans to this JSONL file")
+    parser.add_argument(
+        "--stream", action="store_true", help="print sections as they are written"
+    )
+    parser.add_argument("--file", help="read the source document from this file")
+    args = parser.parse_args()
+    if args.trace:
+        tracer.add_sink(JsonlSink(args.trace))
+    if args.fake:
+        set_backend(FakeBackend())
+    if args.batch:
+        run_batch(args.batch, args.output, args.sections, args.workers)
+        raise SystemExit
+
+    ai = normalize_text(AI)
+    roa = normalize_text(ROA)
+
+    # read files lazily; large ones are summarized chunk by chunk
+    source = open(args.file, "r") if args.file else contextlib.nullcontext(roa)
+    with source as info:
+        if args.stream:
+            section = None
+            for event in stream_article(info, args.sections, args.workers):
+                if event["type"] == "article":
+                    print(f"\n\nTimings: {json.dumps(event['timings'], indent=2)}")
+                    print(f"Prompt savings: {event['prompt_savings']}")
+                    continue
+                if event["section"] != section:
+                    section = event["section"]
+                    print(f"\n\n== {event['subsection']} ==")
+                print(event["text"], end="", flush=True)
+            raise SystemExit
 
-    info = roa
-    stats = get_statistics(info)
-    title = get_title(stats)
-    subsections = get_subsections(stats, title, 6)
-    section = write_section(stats, title, subsections[3])
-    # format the title, subsections, sections, and stats
-    print(f"Statistics: {stats}")
-    print(f"Title: {title}")
-    print(f"Subsections: {subsections}")
-    print(f"Section: {section}")
+        article = generate_article(info, args.sections, args.workers)
+        # format the title, subsections, sections, and stats
+        print(f"Statistics: {article['statistics']}")
+        print(f"Title: {article['title']}")
+        print(f"Subsections: {article['subsections']}")
+        for subsection, section in zip(article["subsections"], article["sections"]):
+            print(f"Section ({subsection}): {section}")
+        print(f"Timings: {json.dumps(article['timings'], indent=2)}")
+        print(f"Prompt savings: {article['prompt_savings']}")
+    print(f"Cache: {response_cache.stats()}")
+    print(f"Scheduler: {scheduler.metrics()}")